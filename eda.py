@@ -1,18 +1,26 @@
 # filename: eda.py
 import pandas as pd
 import numpy as np
+from data_loader import build_annual_summary
 
 # Global setting for analysis year
 LAST_VALID_YEAR = 2019
 
-def perform_eda(df):
+def perform_eda(df, annual=None):
     """
     Prints stats using 2019 as the final year to avoid 2020 data gaps.
+    `annual` is the shared per-Year summary (built here if not supplied).
     """
     print("\n" + "="*50)
     print(f"   PHASE 2: EXPLORATORY DATA ANALYSIS (EDA) [2000-{LAST_VALID_YEAR}]   ")
     print("="*50)
 
+    # Year slices shared by every section below (filtered once)
+    df_valid = df[df['Year'] <= LAST_VALID_YEAR]
+    df_last = df[df['Year'] == LAST_VALID_YEAR]
+    if annual is None:
+        annual = build_annual_summary(df)
+
     # 1. Integrity
     print(f"\n[1] Data Integrity")
     print(f"    - Unique Countries: {df['Country'].nunique()}")
@@ -20,16 +28,14 @@ def perform_eda(df):
 
     # 2. RQ1: Decoupling
     print(f"\n[2] RQ1: Economic Decoupling")
-    # Filter for valid years only
-    df_valid = df[df['Year'] <= LAST_VALID_YEAR]
-    
     if 'GDP_Capita' in df_valid.columns and 'CO2_Total_kt' in df_valid.columns:
-        corr_gdp_co2 = df_valid[['GDP_Capita', 'CO2_Total_kt']].corr().iloc[0,1]
+        corr_gdp_co2 = df_valid['GDP_Capita'].corr(df_valid['CO2_Total_kt'])
         print(f"    - Correlation (Wealth vs. Emissions): {corr_gdp_co2:.4f}")
 
         if 'Energy_Intensity' in df_valid.columns:
-            avg_2000 = df[df['Year'] == 2000]['Energy_Intensity'].mean()
-            avg_last = df[df['Year'] == LAST_VALID_YEAR]['Energy_Intensity'].mean()
+            yearly = annual['Energy_Intensity']
+            avg_2000 = yearly.get(2000, np.nan)
+            avg_last = yearly.get(LAST_VALID_YEAR, np.nan)
             
             # Avoid division by zero
             if avg_2000 and avg_2000 > 0:
@@ -58,6 +64,6 @@ def perform_eda(df):
     print(f"\n[4] RQ3: The Green Divide")
     if 'Income_Group' in df.columns:
         print(f"    - Avg Renewable Share ({LAST_VALID_YEAR}):")
-        print(df[df['Year'] == LAST_VALID_YEAR].groupby('Income_Group', observed=True)['Renewable_Share'].mean().to_string())
+        print(df_last.groupby('Income_Group', observed=True)['Renewable_Share'].mean().to_string())
 
     print("\n" + "="*50)
\ No newline at end of file
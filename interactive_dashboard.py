@@ -5,33 +5,49 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 import os
+import data_loader
+from data_loader import build_annual_summary, frame_fingerprint
 
 # GLOBAL SETTING: Match visualizer.py
 LAST_VALID_YEAR = 2019
 
-def generate_interactive_dashboard(df):
+def generate_interactive_dashboard(df, annual=None):
     """
     Generates an HTML dashboard with 10 interactive charts that EXACTLY match 
     the static figures in visualizer.py, plus insight commentary.
+    `annual` is the shared per-Year summary (built here if not supplied).
     """
     print("\n" + "="*50)
     print("   PHASE 4: INTERACTIVE DASHBOARD GENERATION   ")
     print("="*50)
     
     # Filter dataset to match static report
-    df_clean = df[df['Year'] <= LAST_VALID_YEAR].copy()
+    df_clean = df[df['Year'] <= LAST_VALID_YEAR]
+    if annual is None:
+        annual = build_annual_summary(df)
+    annual = annual.loc[:LAST_VALID_YEAR].reset_index()
+
+    # Skip the rebuild when neither the inputs nor the code producing them changed since the last run
+    output = 'figures/interactive_dashboard.html'
+    stamp = output + '.hash'
+    fingerprint = frame_fingerprint(df, annual, sources=(__file__, data_loader.__file__))
+    if os.path.exists(output) and os.path.exists(stamp):
+        with open(stamp, encoding='utf-8') as f:
+            if f.read().strip() == fingerprint:
+                print(f"-> Dashboard is up to date, reusing '{output}'")
+                return
 
     # --- Generate All 10 Figures (Plotly Versions) ---
     figs = {}
     
     # 1. Equity Gap (Fig 1 in Report)
-    figs['fig1'] = _create_fig1_equity_gap(df_clean)
+    figs['fig1'] = _create_fig1_equity_gap(annual)
     
     # 2. Aid Effectiveness (Fig 2 in Report)
     figs['fig2'] = _create_fig2_aid_effectiveness(df_clean)
     
     # 3. Efficiency Decoupling (Fig 3 in Report)
-    figs['fig3'] = _create_fig3_efficiency_decoupling(df_clean)
+    figs['fig3'] = _create_fig3_efficiency_decoupling(annual)
     
     # 4. Correlation Matrix (Fig 4 in Report)
     figs['fig4'] = _create_fig4_correlation_matrix(df_clean)
@@ -40,7 +56,7 @@ def generate_interactive_dashboard(df):
     figs['fig5'] = _create_fig5_strategic_leaders(df_clean)
     
     # --- Supplementary Figures (6-10) ---
-    figs['fig6'] = _create_fig6_energy_mix(df_clean)
+    figs['fig6'] = _create_fig6_energy_mix(annual)
     figs['fig7'] = _create_fig7_top_aid_recipients(df_clean)
     figs['fig8'] = _create_fig8_income_disparity(df_clean)
     figs['fig9'] = _create_fig9_forecast(df_clean)
@@ -53,21 +69,21 @@ def generate_interactive_dashboard(df):
     if not os.path.exists('figures'):
         os.makedirs('figures')
         
-    with open('figures/interactive_dashboard.html', 'w', encoding='utf-8') as f:
+    with open(output, 'w', encoding='utf-8') as f:
         f.write(html_content)
+    with open(stamp, 'w', encoding='utf-8') as f:
+        f.write(fingerprint)
     
-    print("-> Dashboard saved to 'figures/interactive_dashboard.html'")
+    print(f"-> Dashboard saved to '{output}'")
     print("-> Consistency Check: All 10 figures (including Map) are now interactive.")
 
 # ==========================================
 # PLOTLY FIGURE GENERATORS
 # ==========================================
 
-def _create_fig1_equity_gap(df):
+def _create_fig1_equity_gap(annual):
     """Fig 1: Equity Gap (Electricity vs Cooking)"""
-    if 'Access_Electricity' not in df.columns or 'Access_Cooking' not in df.columns: return go.Figure()
-    
-    annual = df.groupby('Year')[['Access_Electricity', 'Access_Cooking']].mean().reset_index()
+    if 'Access_Electricity' not in annual.columns or 'Access_Cooking' not in annual.columns: return go.Figure()
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=annual['Year'], y=annual['Access_Electricity'], name="Access to Electricity", 
@@ -88,25 +104,24 @@ def _create_fig2_aid_effectiveness(df):
     """Fig 2: Aid Effectiveness (Scatter)"""
     if 'Financial_Flows' not in df.columns: return go.Figure()
     
-    fig = px.scatter(df, x="Financial_Flows", y="Renewable_Capacity", color="Income_Group", 
+    # Zero/NaN points cannot be drawn on log axes: keep them out of the embedded JSON
+    plottable = df[(df['Financial_Flows'] > 0) & (df['Renewable_Capacity'] > 0)]
+    fig = px.scatter(plottable, x="Financial_Flows", y="Renewable_Capacity", color="Income_Group", 
                      size="GDP_Capita", hover_name="Country", log_x=True, log_y=True, 
                      title="<b>Fig 2: Aid Effectiveness Analysis</b>",
                      labels={"Financial_Flows": "Financial Aid ($)", "Renewable_Capacity": "Capacity (W/capita)"},
                      color_discrete_sequence=px.colors.qualitative.Prism)
+    # Keep bubble sizes scaled to the full GDP range (px default: size_max=20)
+    fig.update_traces(marker_sizeref=df['GDP_Capita'].max() / 20 ** 2)
     
     # Add trendline concept (not natively easy in simple px scatter, so we skip strictly for interactive)
     return fig
 
-def _create_fig3_efficiency_decoupling(df):
+def _create_fig3_efficiency_decoupling(annual):
     """Fig 3: Efficiency Decoupling"""
-    if 'Energy_Intensity' not in df.columns: return go.Figure()
-    
-    annual = df.groupby('Year').agg({'GDP_Capita': 'mean', 'Energy_Intensity': 'mean'}).reset_index()
-    
-    # Normalize
-    annual['GDP_Idx'] = (annual['GDP_Capita'] / annual['GDP_Capita'].iloc[0]) * 100
-    annual['Intensity_Idx'] = (annual['Energy_Intensity'] / annual['Energy_Intensity'].iloc[0]) * 100
+    if 'Energy_Intensity' not in annual.columns: return go.Figure()
     
+    # GDP_Idx / Intensity_Idx (2000 = 100) are precomputed in the shared summary
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=annual['Year'], y=annual['GDP_Idx'], name='GDP Growth', line=dict(color='green', width=4)))
     fig.add_trace(go.Scatter(x=annual['Year'], y=annual['Intensity_Idx'], name='Energy Intensity', line=dict(color='red', width=4)))
@@ -127,7 +142,8 @@ def _create_fig4_correlation_matrix(df):
 def _create_fig5_strategic_leaders(df):
     """Fig 5: Top 20 Strategic Leaders"""
     # Get the latest data for each country
-    latest = df.sort_values('Year').groupby('Country').tail(1)
+    # Latest row per country via an O(n) idxmax instead of sorting the whole frame
+    latest = df.loc[df.groupby('Country', observed=True, sort=False)['Year'].idxmax()]
     
     # Get Top 20 and sort Ascending (so largest is at the top in Plotly)
     top20 = latest.nlargest(20, 'Renewable_Capacity').sort_values('Renewable_Capacity', ascending=True)
@@ -153,10 +169,9 @@ def _create_fig5_strategic_leaders(df):
     fig.update_layout(template="plotly_white", coloraxis_showscale=False)
     return fig
 
-def _create_fig6_energy_mix(df):
+def _create_fig6_energy_mix(annual):
     """Fig 6: Energy Mix"""
-    if 'Elec_Fossil' not in df.columns: return go.Figure()
-    annual = df.groupby('Year')[['Elec_Fossil', 'Elec_Renewables', 'Elec_Nuclear']].sum().reset_index()
+    if 'Elec_Fossil' not in annual.columns: return go.Figure()
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=annual['Year'], y=annual['Elec_Fossil'], mode='lines', name='Fossil', stackgroup='one', line=dict(color='gray')))
@@ -168,7 +183,7 @@ def _create_fig6_energy_mix(df):
 
 def _create_fig7_top_aid_recipients(df):
     """Fig 7: Top Aid Recipients"""
-    total = df.groupby('Country')['Financial_Flows'].sum().sort_values(ascending=False).head(10).sort_values(ascending=True)
+    total = df.groupby('Country', observed=True, sort=False)['Financial_Flows'].sum().nlargest(10).sort_values(ascending=True)
     
     fig = px.bar(total, x='Financial_Flows', y=total.index, orientation='h', 
                  title="<b>Fig 7: Top 10 Aid Recipients</b>", color_discrete_sequence=['#27ae60'])
@@ -187,15 +202,19 @@ def _create_fig8_income_disparity(df):
 
 def _create_fig9_forecast(df):
     """Fig 9: Forecast (Trajectories)"""
-    pivoted = df.pivot_table(index='Country', columns='Year', values='Renewable_Share')
-    if 2000 not in pivoted.columns: return go.Figure()
+    # Only the two endpoint years are needed: subtract them directly instead of pivoting every year
+    share_start = df.loc[df['Year'] == 2000].set_index('Country')['Renewable_Share']
+    share_end = df.loc[df['Year'] == LAST_VALID_YEAR].set_index('Country')['Renewable_Share']
+    if share_start.empty: return go.Figure()
     
-    pivoted['Growth'] = pivoted[LAST_VALID_YEAR] - pivoted[2000]
-    top5 = pivoted.nlargest(5, 'Growth').index.tolist()
+    growth = share_end - share_start
+    top5 = growth.nlargest(5).index.tolist()
     
+    # One membership scan + grouping instead of a full boolean scan per country
+    movers = df[df['Country'].isin(top5)].groupby('Country', observed=True)
     fig = go.Figure()
     for country in top5:
-        dat = df[df['Country'] == country]
+        dat = movers.get_group(country)
         fig.add_trace(go.Scatter(x=dat['Year'], y=dat['Renewable_Share'], name=country, mode='lines+markers'))
         
     fig.update_layout(title="<b>Fig 9: Trajectories of Top Movers</b>", template="plotly_white")
@@ -203,7 +222,7 @@ def _create_fig9_forecast(df):
 
 def _create_fig10_choropleth_map(df):
     """Fig 10: Choropleth Map"""
-    df_map = df[df['Year'] == LAST_VALID_YEAR].copy()
+    df_map = df[df['Year'] == LAST_VALID_YEAR]
     if df_map.empty or 'Renewable_Capacity' not in df.columns: return go.Figure()
     
     fig = px.choropleth(df_map, 
@@ -221,7 +240,8 @@ def _create_fig10_choropleth_map(df):
 def _assemble_html(figs):
     """Assembles the 10 Plotly figures into a polished HTML layout with insights."""
     
-    divs = {k: v.to_html(full_html=False, include_plotlyjs='cdn', config={'displayModeBar': False}) for k, v in figs.items()}
+    # plotly.js is loaded once, by fig1 (the first chart on the page); the other divs reuse window.Plotly
+    divs = {k: v.to_html(full_html=False, include_plotlyjs='cdn' if k == 'fig1' else False, config={'displayModeBar': False}) for k, v in figs.items()}
     
     # Define Insights matching the Report Narrative
     insights = {
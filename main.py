@@ -1,5 +1,5 @@
 # filename: main.py
-from data_loader import load_and_clean_data
+from data_loader import load_and_clean_data, build_annual_summary
 from eda import perform_eda
 from visualizer import generate_visualizations
 from interactive_dashboard import generate_interactive_dashboard
@@ -9,9 +9,10 @@ def main():
     df = load_and_clean_data()
     
     if not df.empty:
-        perform_eda(df)
-        generate_visualizations(df)
-        generate_interactive_dashboard(df)
+        annual = build_annual_summary(df)
+        perform_eda(df, annual)
+        generate_visualizations(df, annual)
+        generate_interactive_dashboard(df, annual)
         print("\nPipeline Complete. Check the /figures directory.")
     else:
         print("Error: Dataset empty or not found.")
@@ -1,27 +1,45 @@
 # filename: visualizer.py
+import matplotlib
+matplotlib.use('Agg')  # Figures are only ever saved to disk: no GUI backend
 import matplotlib.pyplot as plt
-import geopandas as gpd
 import seaborn as sns
 import numpy as np
 import pandas as pd
 import os
+from functools import lru_cache
+from data_loader import build_annual_summary
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
 
 # Set global style
 sns.set_theme(style="whitegrid", context="talk")
 plt.rcParams['figure.figsize'] = (14, 8)
-plt.rcParams['savefig.dpi'] = 300
+plt.rcParams['savefig.dpi'] = 150  # Supplementary figures; see REPORT_DPI / EDA_DPI
 plt.rcParams['axes.titleweight'] = 'bold'
 
 # GLOBAL SETTING: Use 2019 as the cutoff due to missing 2020 data
 LAST_VALID_YEAR = 2019
 
+# Report figures 1-5 are saved at print quality, diagnostic EDA plots at screen
+# resolution; the supplementary figures use the savefig.dpi default
+REPORT_DPI = 300
+EDA_DPI = 100
+
+# Fig 10 country boundaries: fetched once, then read from a local GeoParquet copy
+WORLD_GEOJSON_URL = "https://raw.githubusercontent.com/python-visualization/folium/main/examples/data/world-countries.json"
+WORLD_CACHE = 'data/world-countries.parquet'
+
 def create_output_folder():
     if not os.path.exists('figures'):
         os.makedirs('figures')
 
-def generate_visualizations(df):
+def generate_visualizations(df, annual=None):
     """
     Generates 10 static figures aligned with the 'Financing the Future' PDF report.
+    `annual` is the shared per-Year summary (built here if not supplied).
     """
     create_output_folder()
     print("\n" + "="*60)
@@ -29,21 +47,26 @@ def generate_visualizations(df):
     print("="*60)
     
     # Filter dataset
-    df_clean = df[df['Year'] <= LAST_VALID_YEAR].copy()
+    df_clean = df[df['Year'] <= LAST_VALID_YEAR]
+    if annual is None:
+        annual = build_annual_summary(df)
+    annual = annual.loc[:LAST_VALID_YEAR].reset_index()
+    # One Country grouping (codes computed once) shared by Figs 5 and 7
+    by_country = df_clean.groupby('Country', observed=True, sort=False)
     
     # Generating EDA visualizations
     _plot_eda_summary(df)
 
     # --- REPORT FIGURES (1-5) ---
-    _plot_fig1_equity_gap(df_clean)
+    _plot_fig1_equity_gap(annual)
     _plot_fig2_aid_effectiveness(df_clean)
-    _plot_fig3_efficiency_decoupling(df_clean)
+    _plot_fig3_efficiency_decoupling(annual)
     _plot_fig4_correlation_matrix(df_clean)
-    _plot_fig5_strategic_leaders(df_clean)
+    _plot_fig5_strategic_leaders(df_clean, by_country)
     
     # --- SUPPLEMENTARY FIGURES (6-10) ---
-    _plot_fig6_energy_mix(df_clean)
-    _plot_fig7_top_aid_recipients(df_clean)
+    _plot_fig6_energy_mix(annual)
+    _plot_fig7_top_aid_recipients(by_country)
     _plot_fig8_income_disparity(df_clean)
     _plot_fig9_forecast(df_clean)
     _plot_fig10_choropleth_map(df_clean)
@@ -57,8 +80,12 @@ def _plot_eda_summary(df):
     
     # 1. Histogram Stats
     if 'Energy_Intensity' in df.columns:
-        mean_val = df['Energy_Intensity'].mean()
-        median_val = df['Energy_Intensity'].median()
+        # Raw float32 array into bottleneck's C reductions (pandas never routes nanmean there)
+        vals = df['Energy_Intensity'].to_numpy()
+        if bn is not None:
+            mean_val, median_val = bn.nanmean(vals), bn.nanmedian(vals)
+        else:
+            mean_val, median_val = np.nanmean(vals), np.nanmedian(vals)
         skew_val = df['Energy_Intensity'].skew()
         print(f"   - Intensity: Mean={mean_val:.2f}, Median={median_val:.2f}, Skew={skew_val:.2f}")
         
@@ -67,7 +94,7 @@ def _plot_eda_summary(df):
         plt.title('EDA: Distribution of Energy Intensity (Skew Check)', fontweight='bold')
         plt.xlabel('Energy Intensity (MJ/$ GDP)')
         plt.ylabel('Frequency')
-        plt.tight_layout(); plt.savefig('figures/fig_eda_1_intensity_histogram.png'); plt.close()
+        plt.tight_layout(); plt.savefig('figures/fig_eda_1_intensity_histogram.png', dpi=EDA_DPI); plt.close()
 
     # 2. Boxplot Stats
     cols = ['Access_Electricity', 'Access_Cooking', 'Renewable_Capacity', 'Energy_Intensity']
@@ -78,30 +105,30 @@ def _plot_eda_summary(df):
             print(f"     {c}: Max = {df[c].max():.2f}")
             
         plt.figure(figsize=(14, 8))
-        df_melt = df[available].melt(var_name='Indicator', value_name='Value')
-        sns.boxplot(x='Indicator', y='Value', data=df_melt, palette='Set2')
+        # Wide-form input: seaborn reads each column directly, no long-format copy
+        sns.boxplot(data=df[available], palette='Set2')
+        plt.xlabel('Indicator'); plt.ylabel('Value')
         plt.yscale('log')
         plt.title('EDA: Outlier Detection', fontweight='bold')
-        plt.tight_layout(); plt.savefig('figures/fig_eda_2_multi_boxplot.png'); plt.close()
+        plt.tight_layout(); plt.savefig('figures/fig_eda_2_multi_boxplot.png', dpi=EDA_DPI); plt.close()
 
     # 3. Missing Values
     plt.figure(figsize=(12, 6))
-    missing = df.isnull().sum()
+    # Non-null counts per column: no n x m boolean frame
+    missing = len(df) - df.count()
     missing = missing[missing > 0].sort_values(ascending=False)
     if not missing.empty:
         print(f"   - Missing Values Found: {missing.to_dict()}")
         sns.barplot(x=missing.values, y=missing.index, palette='Reds_r')
         plt.title('EDA: Missing Values Summary', fontweight='bold')
-        plt.tight_layout(); plt.savefig('figures/fig_eda_3_missing_values.png'); plt.close()
+        plt.tight_layout(); plt.savefig('figures/fig_eda_3_missing_values.png', dpi=EDA_DPI); plt.close()
 
 # --- REPORT FIGURES (MATCHING PDF) ---
 
-def _plot_fig1_equity_gap(df):
+def _plot_fig1_equity_gap(annual):
     print("\n[Fig 1] Equity Gap (Electricity vs Cooking)")
-    if 'Access_Electricity' not in df.columns or 'Access_Cooking' not in df.columns: return
+    if 'Access_Electricity' not in annual.columns or 'Access_Cooking' not in annual.columns: return
 
-    annual = df.groupby('Year')[['Access_Electricity', 'Access_Cooking']].mean().reset_index()
-    
     # Log the gap for the report
     gap_2000 = annual.iloc[0]['Access_Electricity'] - annual.iloc[0]['Access_Cooking']
     gap_end = annual.iloc[-1]['Access_Electricity'] - annual.iloc[-1]['Access_Cooking']
@@ -109,8 +136,8 @@ def _plot_fig1_equity_gap(df):
     
     # Detailed Data Log
     print("   - Annual Data Points (Year | Elec | Cooking):")
-    for _, row in annual.iterrows():
-        print(f"     {int(row['Year'])}: {row['Access_Electricity']:.2f}% | {row['Access_Cooking']:.2f}%")
+    print("\n".join(f"     {int(year)}: {elec:.2f}% | {cook:.2f}%"
+                    for year, elec, cook in zip(annual['Year'], annual['Access_Electricity'], annual['Access_Cooking'])))
 
     plt.figure()
     plt.plot(annual['Year'], annual['Access_Electricity'], label='Access to Electricity', color='#2ecc71', linewidth=3)
@@ -123,7 +150,7 @@ def _plot_fig1_equity_gap(df):
     plt.ylabel('Population Access (%)')
     plt.ylim(40, 100)
     plt.legend()
-    plt.tight_layout(); plt.savefig('figures/fig1_equity_gap.png'); plt.close()
+    plt.tight_layout(); plt.savefig('figures/fig1_equity_gap.png', dpi=REPORT_DPI); plt.close()
 
 def _plot_fig2_aid_effectiveness(df):
     print("\n[Fig 2] Aid Effectiveness (Scatter)")
@@ -135,7 +162,7 @@ def _plot_fig2_aid_effectiveness(df):
     
     # Check stats by group to verify visual clusters
     print("   - Average Stats by Income Group:")
-    group_stats = df.groupby('Income_Group')[['Financial_Flows', 'Renewable_Capacity']].mean()
+    group_stats = df.groupby('Income_Group', observed=True)[['Financial_Flows', 'Renewable_Capacity']].mean()
     print(group_stats.to_string())
 
     plt.figure()
@@ -149,21 +176,16 @@ def _plot_fig2_aid_effectiveness(df):
     plt.ylabel('Renewable Capacity (W/capita)')
     plt.xscale('log')
     plt.yscale('log')
-    plt.tight_layout(); plt.savefig('figures/fig2_aid_effectiveness.png'); plt.close()
+    plt.tight_layout(); plt.savefig('figures/fig2_aid_effectiveness.png', dpi=REPORT_DPI); plt.close()
 
-def _plot_fig3_efficiency_decoupling(df):
+def _plot_fig3_efficiency_decoupling(annual):
     print("\n[Fig 3] Efficiency Decoupling (GDP vs Energy Intensity)")
-    if 'Energy_Intensity' not in df.columns: return
+    if 'Energy_Intensity' not in annual.columns: return
 
-    annual = df.groupby('Year').agg({'GDP_Capita': 'mean', 'Energy_Intensity': 'mean'}).reset_index()
-    
-    # Normalize to 2000 = 100
+    # 2000 = 100 indices come precomputed with the shared summary
     base_gdp = annual['GDP_Capita'].iloc[0]
     base_int = annual['Energy_Intensity'].iloc[0]
     
-    annual['GDP_Idx'] = (annual['GDP_Capita'] / base_gdp) * 100
-    annual['Intensity_Idx'] = (annual['Energy_Intensity'] / base_int) * 100
-    
     print(f"   - Baseline (2000): GDP=${base_gdp:.2f}, Intensity={base_int:.2f} MJ/$")
     print(f"   - Final ({LAST_VALID_YEAR}): GDP=${annual['GDP_Capita'].iloc[-1]:.2f}, Intensity={annual['Energy_Intensity'].iloc[-1]:.2f} MJ/$")
     print(f"   - Indices ({LAST_VALID_YEAR}): GDP Index={annual['GDP_Idx'].iloc[-1]:.1f}, Intensity Index={annual['Intensity_Idx'].iloc[-1]:.1f}")
@@ -175,7 +197,7 @@ def _plot_fig3_efficiency_decoupling(df):
     plt.title('Fig 3: The Efficiency Paradox (Decoupling Growth from Energy Use)')
     plt.ylabel('Index (2000 = 100)')
     plt.legend()
-    plt.tight_layout(); plt.savefig('figures/fig3_efficiency_decoupling.png'); plt.close()
+    plt.tight_layout(); plt.savefig('figures/fig3_efficiency_decoupling.png', dpi=REPORT_DPI); plt.close()
 
 def _plot_fig4_correlation_matrix(df):
     print("\n[Fig 4] Correlation Matrix")
@@ -190,30 +212,30 @@ def _plot_fig4_correlation_matrix(df):
     plt.figure(figsize=(10, 8))
     sns.heatmap(corr, annot=True, fmt=".2f", cmap='RdBu', center=0)
     plt.title('Fig 4: Correlation Matrix of Drivers')
-    plt.tight_layout(); plt.savefig('figures/fig4_correlation_matrix.png'); plt.close()
+    plt.tight_layout(); plt.savefig('figures/fig4_correlation_matrix.png', dpi=REPORT_DPI); plt.close()
 
-def _plot_fig5_strategic_leaders(df):
+def _plot_fig5_strategic_leaders(df, by_country):
     print("\n[Fig 5] Top 20 Strategic Leaders (Capacity)")
-    # Get latest year data per country
-    latest = df.sort_values('Year').groupby('Country').tail(1)
+    # Get latest year data per country (O(n) idxmax instead of sorting the whole frame)
+    latest = df.loc[by_country['Year'].idxmax()]
     top20 = latest.nlargest(20, 'Renewable_Capacity')
     
     print(f"   - Top 20 Countries by Capacity in {LAST_VALID_YEAR}:")
-    for rank, (idx, row) in enumerate(top20.iterrows(), 1):
-        print(f"     {rank}. {row['Country']}: {row['Renewable_Capacity']:.2f} W/capita")
+    print("\n".join(f"     {rank}. {country}: {cap:.2f} W/capita"
+                    for rank, (country, cap) in enumerate(zip(top20['Country'], top20['Renewable_Capacity']), 1)))
 
     plt.figure(figsize=(12, 8))
-    sns.barplot(x=top20['Renewable_Capacity'], y=top20['Country'], palette='Blues_r')
+    # Plain string labels: a categorical y-axis would reserve a slot for every country
+    sns.barplot(x=top20['Renewable_Capacity'], y=top20['Country'].astype(str), palette='Blues_r')
     plt.title(f'Fig 5: Top 20 Nations by Renewable Capacity ({LAST_VALID_YEAR})')
     plt.xlabel('Watts per Capita')
-    plt.tight_layout(); plt.savefig('figures/fig5_strategic_leaders.png'); plt.close()
+    plt.tight_layout(); plt.savefig('figures/fig5_strategic_leaders.png', dpi=REPORT_DPI); plt.close()
 
 # --- SUPPLEMENTARY FIGURES (6-10) ---
 
-def _plot_fig6_energy_mix(df):
+def _plot_fig6_energy_mix(annual):
     print("\n[Fig 6] Global Energy Mix")
-    if 'Elec_Fossil' not in df.columns: return
-    annual = df.groupby('Year')[['Elec_Fossil', 'Elec_Renewables', 'Elec_Nuclear']].sum().reset_index()
+    if 'Elec_Fossil' not in annual.columns: return
     
     print("   - Global TWh Generation (Start vs End):")
     for yr_idx in [0, -1]:
@@ -221,21 +243,22 @@ def _plot_fig6_energy_mix(df):
         print(f"     Year {int(row['Year'])}: Fossil={row['Elec_Fossil']:.0f} | Renewables={row['Elec_Renewables']:.0f} | Nuclear={row['Elec_Nuclear']:.0f}")
 
     plt.figure()
-    plt.stackplot(annual['Year'], annual['Elec_Fossil'], annual['Elec_Nuclear'], annual['Elec_Renewables'], labels=['Fossil', 'Nuclear', 'Renewables'], colors=['gray', 'gold', 'green'], alpha=0.8)
+    # One (3, years) block for the three layers instead of three Series conversions
+    mix = annual[['Elec_Fossil', 'Elec_Nuclear', 'Elec_Renewables']].to_numpy().T
+    plt.stackplot(annual['Year'].to_numpy(), mix, labels=['Fossil', 'Nuclear', 'Renewables'], colors=['gray', 'gold', 'green'], alpha=0.8)
     plt.title('Fig 6: Global Electricity Generation Mix')
     plt.legend(loc='upper left')
     plt.tight_layout(); plt.savefig('figures/fig6_energy_mix.png'); plt.close()
 
-def _plot_fig7_top_aid_recipients(df):
+def _plot_fig7_top_aid_recipients(by_country):
     print("\n[Fig 7] Top Aid Recipients")
-    total = df.groupby('Country')['Financial_Flows'].sum().sort_values(ascending=False).head(10)
+    total = by_country['Financial_Flows'].sum().nlargest(10)
     
     print("   - Top 10 Total Financial Aid Received (All Years Sum):")
-    for country, val in total.items():
-        print(f"     {country}: ${val:,.0f}")
+    print("\n".join(f"     {country}: ${val:,.0f}" for country, val in total.items()))
 
     plt.figure()
-    sns.barplot(x=total.values, y=total.index, palette='Greens_r')
+    sns.barplot(x=total.values, y=total.index.astype(str), palette='Greens_r')
     plt.title('Fig 7: Top 10 Recipients of Financial Aid')
     plt.tight_layout(); plt.savefig('figures/fig7_top_aid.png'); plt.close()
 
@@ -243,7 +266,7 @@ def _plot_fig8_income_disparity(df):
     print("\n[Fig 8] Income Disparity (Renewable Share)")
     
     print("   - Median Renewable Share by Income Group:")
-    medians = df.groupby('Income_Group')['Renewable_Share'].median().sort_values(ascending=False)
+    medians = df.groupby('Income_Group', observed=True)['Renewable_Share'].median().sort_values(ascending=False)
     print(medians.to_string())
 
     plt.figure()
@@ -253,19 +276,24 @@ def _plot_fig8_income_disparity(df):
 
 def _plot_fig9_forecast(df):
     print("\n[Fig 9] Forecast/Trajectories")
-    pivoted = df.pivot_table(index='Country', columns='Year', values='Renewable_Share')
+    # Only the two endpoint years feed the ranking: filter before pivoting.
+    # (Country, Year) is unique, so a plain pivot (no mean aggregation) suffices
+    endpoints = df[df['Year'].isin([2000, LAST_VALID_YEAR])]
+    pivoted = endpoints.pivot(index='Country', columns='Year', values='Renewable_Share')
     if 2000 not in pivoted.columns: return
     
     pivoted['Growth'] = pivoted[LAST_VALID_YEAR] - pivoted[2000]
     top = pivoted.nlargest(5, 'Growth')
     
     print("   - Top 5 Movers (Share Growth 2000-2019):")
-    for country, row in top.iterrows():
-        print(f"     {country}: {row[2000]:.1f}% -> {row[LAST_VALID_YEAR]:.1f}% (Growth: +{row['Growth']:.1f}%)")
+    print("\n".join(f"     {country}: {start:.1f}% -> {end:.1f}% (Growth: +{growth:.1f}%)"
+                    for country, start, end, growth in zip(top.index, top[2000], top[LAST_VALID_YEAR], top['Growth'])))
 
+    # One membership scan + grouping instead of a full boolean scan per country
+    movers = df[df['Country'].isin(top.index)].groupby('Country', observed=True)
     plt.figure()
     for c in top.index:
-        dat = df[df['Country'] == c]
+        dat = movers.get_group(c)
         plt.plot(dat['Year'], dat['Renewable_Share'], label=c)
     plt.title('Fig 9: Trajectories of Top Movers')
     plt.legend()
@@ -273,21 +301,40 @@ def _plot_fig9_forecast(df):
 
 def _plot_fig10_choropleth_map(df):
     print("\n[Fig 10] Choropleth Map Data Check")
-    # Uses internet data for geometry
+    # Uses internet data for geometry (first run only)
     try:
-        world = gpd.read_file("https://raw.githubusercontent.com/python-visualization/folium/main/examples/data/world-countries.json")
-        data_map = df[df['Year'] == LAST_VALID_YEAR].copy()
+        world = _load_world_boundaries()
+        data_map = df[df['Year'] == LAST_VALID_YEAR]
         
         # Check merge integrity
         print(f"   - Map Year: {LAST_VALID_YEAR}")
         print(f"   - Countries in Dataset: {len(data_map)}")
         print(f"   - Countries in GeoJSON: {len(world)}")
         
-        world_data = world.merge(data_map, how="left", left_on="name", right_on="Country")
+        # Only the plotted column is needed: a dict lookup per polygon instead of a full merge
+        capacity_by_name = dict(zip(data_map['Country'].astype(str), data_map['Renewable_Capacity']))
+        world_data = world.assign(Renewable_Capacity=world['name'].map(capacity_by_name))
         fig, ax = plt.subplots(1, 1, figsize=(16, 10))
         world_data.plot(column='Renewable_Capacity', ax=ax, legend=True, cmap='Blues', missing_kwds={'color': 'lightgrey'})
         ax.set_axis_off()
         plt.title(f'Fig 10: Global Renewable Capacity Map ({LAST_VALID_YEAR})')
         plt.tight_layout(); plt.savefig('figures/fig10_map.png'); plt.close()
     except Exception as e:
-        print(f"Skipping map generation due to: {e}")
\ No newline at end of file
+        print(f"Skipping map generation due to: {e}")
+
+@lru_cache(maxsize=1)
+def _load_world_boundaries():
+    """Country polygons for Fig 10, downloaded on first use and cached to WORLD_CACHE."""
+    # Imported here: only Fig 10 needs geopandas (and its shapely/pyproj stack)
+    import geopandas as gpd
+
+    if os.path.exists(WORLD_CACHE):
+        return gpd.read_parquet(WORLD_CACHE)
+
+    world = gpd.read_file(WORLD_GEOJSON_URL)
+    try:
+        world.to_parquet(WORLD_CACHE)
+        print(f"   - Cached country boundaries to: {WORLD_CACHE}")
+    except (OSError, ImportError) as e:
+        print(f"   - Skipping boundary cache due to: {e}")
+    return world